@@ -155,11 +155,11 @@ def crop_field(var, lon1, lon2, lat1, lat2):
         ds: xarray.DataArray or xarray.Dataset
             The cropped variable
     """
-    ds = var.copy()
-    # If the domain crosses/touches the meridian 180, convert to 0-360
+    ds = var
+    # If the domain crosses/touches the meridian 180, convert to 0-360 (assign_coords does not copy the data)
     if (lon1 <= 180 and lon2 >= -180 and lon1 > lon2) or (lon1 == -180) or (lon2 == 180):
-        ds.coords['longitude'] = (ds.longitude + 360) %360
-        ds = ds.sortby(ds.longitude)
+        ds = ds.assign_coords(longitude=(ds.longitude + 360) %360)
+        ds = ds.sortby('longitude')
         if lon2 < 0:
             lon2 = lon2 + 360
         if lon1 < 0:
@@ -2,7 +2,7 @@ import os
 import argparse
 from utils_dataset import build_dataset
 
-def main(basin, n_clusters, res, first_year, last_year, remove_seasonality, remove_trend):
+def main(basin, n_clusters, res, first_year, last_year, remove_seasonality, remove_trend, tcg_dir):
     # List of variables to include for the feature selection process
     cluster_variables = ['abs_vo850', 'mpi', 'msl', 'r700', 'sst', 'vo850', 'vws850-200', 'w']
     climate_indexes = ['AMM', 'ENSO3.4', 'NAO', 'PDO', 'PNA', 'SOI', 'TNA', 'TSA', 'WP'] # EP-NP is equal to -99.9 on december
@@ -27,7 +27,7 @@ def main(basin, n_clusters, res, first_year, last_year, remove_seasonality, remo
         detrend = False
     indexes_path = os.path.join(project_dir, 'data', 'CI')
     resolution = '{}x{}'.format(res, res)
-    target_path = os.path.join(project_dir, 'data', 'IBTrACS', resolution, 'TCG', f'TCG_{resolution}')
+    target_path = os.path.join(project_dir, 'data', 'IBTrACS', resolution, tcg_dir, f'TCG_{resolution}')
     # Folder to save the dataset
     save_path = cluster_path
 
@@ -65,5 +65,6 @@ if __name__ == '__main__':
     parser.add_argument('--last_year', type=int, default=2022, help='Last year')
     parser.add_argument('--remove_seasonality', type=str, default='n', help='If y remove seasonality')
     parser.add_argument('--remove_trend', type=str, default='n', help='If y remove trend')
+    parser.add_argument('--tcg_dir', type=str, default='TCG_chunked', help='Folder of the yearly TCG files (TCG_chunked is written by convert_tcg.py, TCG for the original files)')
     args = parser.parse_args()
-    main(args.basin, args.n_clusters, args.res, args.first_year, args.last_year, args.remove_seasonality, args.remove_trend)
\ No newline at end of file
+    main(args.basin, args.n_clusters, args.res, args.first_year, args.last_year, args.remove_seasonality, args.remove_trend, args.tcg_dir)
\ No newline at end of file
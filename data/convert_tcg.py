@@ -0,0 +1,36 @@
+import os
+import argparse
+import numpy as np
+import xarray as xr
+
+def main(res, first_year, last_year, chunk_deg):
+    # Directories of the original yearly TCG files and of the converted ones
+    project_dir = '/Users/huripari/Documents/PhD/TCs_Genesis'
+    resolution = '{}x{}'.format(res, res)
+    in_path = os.path.join(project_dir, 'data', 'IBTrACS', resolution, 'TCG')
+    out_path = os.path.join(project_dir, 'data', 'IBTrACS', resolution, 'TCG_chunked')
+    os.makedirs(out_path, exist_ok=True)
+
+    # Chunks span one year in time and chunk_deg degrees in space, so that a basin crop only touches a few chunks
+    chunk_cells = int(round(chunk_deg / res))
+
+    # Rewrite each yearly file as NetCDF4 with Blosc LZ4 + bitshuffle compression
+    years = np.arange(first_year, last_year+1, 1)
+    for y, year in enumerate(years):
+        filename = f'TCG_{resolution}_{year}.nc'
+        with xr.open_dataset(os.path.join(in_path, filename)) as ds:
+            ds = ds.load()
+        chunksizes = (min(12, ds.sizes['time']), min(chunk_cells, ds.sizes['latitude']), min(chunk_cells, ds.sizes['longitude']))
+        encoding = {'tcg': {'chunksizes': chunksizes, 'compression': 'blosc_lz4', 'blosc_shuffle': 2}}
+        ds.to_netcdf(os.path.join(out_path, filename), engine='netcdf4', encoding=encoding)
+        print(f'\rYear: {year} ({y+1}/{len(years)})', end='')
+    print()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert the yearly TCG files to chunked and compressed NetCDF4')
+    parser.add_argument('--res', type=float, default=2.5, help='Resolution')
+    parser.add_argument('--first_year', type=int, default=1980, help='First year')
+    parser.add_argument('--last_year', type=int, default=2022, help='Last year')
+    parser.add_argument('--chunk_deg', type=float, default=40, help='Spatial size of the chunks in degrees')
+    args = parser.parse_args()
+    main(args.res, args.first_year, args.last_year, args.chunk_deg)
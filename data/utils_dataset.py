@@ -2,7 +2,27 @@ import numpy as np
 import pandas as pd
 import xarray as xr
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from joblib import Parallel, delayed
+from numba import njit
 from statsmodels.tsa.seasonal import STL, seasonal_decompose
+try:
+    from hastl import STL as HSTL
+except ImportError:
+    HSTL = None
+_HASTL_DEVICES = ['opencl', 'cuda', 'multicore', 'c']
+
+# Domain of each basin: (min_lon, max_lon, min_lat, max_lat)
+_BASIN_BOX = {
+    'NWP': (100, 180, 0, 40),
+    'NEP': (-180, -75, 0, 40),
+    'NA': (-100, 0, 0, 40),
+    'NI': (45, 100, 0, 40),
+    'SP': (135, -70, -40, 0),
+    'SI': (35, 135, -40, 0),
+    'GLB': (-181, 181, -40, 40),
+}
 
 def crop_field(var, lon1, lon2, lat1, lat2):
     """
@@ -23,11 +43,11 @@ def crop_field(var, lon1, lon2, lat1, lat2):
         ds: xarray.DataArray or xarray.Dataset
             The cropped variable
     """
-    ds = var.copy()
-    # If the domain crosses/touches the meridian 180, convert to 0-360
+    ds = var
+    # If the domain crosses/touches the meridian 180, convert to 0-360 (assign_coords does not copy the data)
     if (lon1 <= 180 and lon2 >= -180 and lon1 > lon2) or (lon1 == -180) or (lon2 == 180):
-        ds.coords['longitude'] = (ds.longitude + 360) %360
-        ds = ds.sortby(ds.longitude)
+        ds = ds.assign_coords(longitude=(ds.longitude + 360) %360)
+        ds = ds.sortby('longitude')
         if lon2 < 0:
             lon2 = lon2 + 360
         if lon1 < 0:
@@ -35,184 +55,367 @@ def crop_field(var, lon1, lon2, lat1, lat2):
     return ds.sel(longitude=slice(lon1, lon2), latitude=slice(lat2, lat1))
 
 def check_consecutive_repeats(df,col):
-    repeats = df.shift(1) == df
-    if repeats.sum() > 0:
+    a = df.to_numpy()
+    repeats = a[1:] == a[:-1]
+    if np.count_nonzero(repeats) > 0:
         print('Consecutive values repeated found at',col)
-        print(repeats[repeats].index)
+        print(df.index[np.flatnonzero(repeats) + 1])
+
+@njit(cache=True)
+def qc_column(a):
+    """
+    Sanity checks of a single column, without allocating intermediate arrays.
+
+    Inputs:
+        a: numpy.ndarray
+            The float64 values of the column (NaN for missing values)
+    Outputs:
+        n_null: int
+            Number of missing values
+        n_repeat: int
+            Number of values equal to the previous one
+        n_outlier: int
+            Number of values whose absolute value is above the average+7*std
+    """
+    # First pass: missing values, consecutive repeats and Welford mean/std of the valid values
+    n_null = 0
+    n_repeat = 0
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(a.shape[0]):
+        x = a[i]
+        if np.isnan(x):
+            n_null += 1
+            continue
+        if i > 0 and x == a[i-1]:
+            n_repeat += 1
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+    # Second pass: values above the average+7*std (std is undefined with less than two values)
+    n_outlier = 0
+    if n > 1:
+        threshold = mean + 7*np.sqrt(m2 / (n - 1))
+        for i in range(a.shape[0]):
+            if np.abs(a[i]) > threshold:
+                n_outlier += 1
+    return n_null, n_repeat, n_outlier
+
+def read_climate_index(filename):
+    """
+    Read a climate index txt file (one row per year: year followed by the 12 monthly values).
+    The parsed file is cached and only read again if it has been modified since.
+
+    Inputs:
+        filename: str
+            Path to the climate index txt file
+    Outputs:
+        index: pandas.Series
+            The monthly values of the climate index, indexed by the first day of each month
+    """
+    return _read_climate_index(filename, os.path.getmtime(filename))
+
+@lru_cache(maxsize=None)
+def _read_climate_index(filename, mtime):
+    # mtime is only part of the cache key, so that modified files are parsed again
+    # Whitespace-separated values are handled by the C parser; -999 and -99.9 flag missing values,
+    # matched on the float64 values so that any spelling of the placeholders (e.g. -99.90) is caught
+    data = pd.read_csv(filename, sep=r'\s+', engine='c', header=None, dtype=np.float64)
+    data = data.replace([-999, -99.9], np.nan)
+    data = data.astype({col: np.float32 for col in data.columns[1:]}).astype({0: np.int32})
+    long = data.set_index(0).stack().rename_axis(['year', 'month']).reset_index(name='value')
+    dates = pd.to_datetime(dict(year=long['year'], month=long['month'], day=1))
+    return long.set_index(dates)['value']
+
+def read_cluster_data(cluster_path, cluster_variables, date_range):
+    """
+    Read the cluster averages of the specified variables and merge them in a single dataframe.
+
+    Inputs:
+        cluster_path: str
+            Path to the folder containing the averages_<variable>.csv files
+        cluster_variables: list of str
+            The variables to read
+        date_range: pandas.DatetimeIndex
+            The dates to keep
+    Outputs:
+        dataset_cluster: pandas.DataFrame
+            The cluster averages of all the variables, indexed by date_range
+    """
+    def read_averages(var):
+        path = os.path.join(cluster_path, f'averages_{var}.csv')
+        return pd.read_csv(path, index_col=0, parse_dates=True).reindex(date_range)
+
+    # The C parser releases the GIL, so the files are read in parallel threads
+    with ThreadPoolExecutor(max_workers=max(1, min(len(cluster_variables), os.cpu_count() or 1))) as executor:
+        frames = list(executor.map(read_averages, cluster_variables))
+    return pd.concat(frames, axis=1, copy=False)
+
+@lru_cache(maxsize=None)
+def basin_mask(basin):
+    """
+    Load the mask of the basin (read once per process and then cached).
+
+    Inputs:
+        basin: str
+            The basin considered, read from <basin>_mask.nc
+    Outputs:
+        mask: numpy.ndarray
+            Boolean (latitude, longitude) array, True inside the basin
+        latitude: numpy.ndarray
+            The latitudes of the mask
+        longitude: numpy.ndarray
+            The longitudes of the mask
+    The arrays are shared by all callers through the cache, so they are read-only.
+    """
+    with xr.open_dataarray(f'{basin}_mask.nc') as mask:
+        mask = mask.transpose('latitude', 'longitude')
+        arrays = (mask.values == 1, mask.latitude.values.copy(), mask.longitude.values.copy())
+    for array in arrays:
+        array.setflags(write=False)
+    return arrays
+
+def count_tcg(basin, target_path, first_year, last_year, min_lon, max_lon, min_lat, max_lat):
+    """
+    Count the number of tropical cyclone genesis events per month in the specified basin.
+    The yearly files are opened lazily with dask, so that only the cropped domain is read from disk.
+
+    Inputs:
+        basin: str
+            The basin considered (NEP and NA are further restricted with their mask)
+        target_path: str
+            Path prefix of the yearly TCG files (<target_path>_<year>.nc)
+        first_year: int
+            The first year to consider
+        last_year: int
+            The last year to consider
+        min_lon, max_lon, min_lat, max_lat: float
+            The domain of the basin
+    Outputs:
+        counts: numpy.ndarray
+            The number of TCG events per month
+    """
+    years = np.arange(first_year, last_year+1, 1)
+    paths = [target_path + f'_{year}.nc' for year in years]
+    tcg_ds_or = xr.open_mfdataset(paths, combine='nested', concat_dim='time', engine='netcdf4', parallel=True, chunks={'time': 12}, data_vars=['tcg'])
+    if basin == 'NEP' or basin == 'NA':
+        tcg_ds = crop_field(tcg_ds_or, min_lon, max_lon, min_lat, max_lat)
+        mask, mask_lat, mask_lon = basin_mask(basin)
+        # The mask is applied by position, so it must be on the same grid (and in the same order) as the cropped field
+        same_lat = mask_lat.shape == tcg_ds.latitude.shape and np.allclose(mask_lat, tcg_ds.latitude.values)
+        same_lon = mask_lon.shape == tcg_ds.longitude.shape and np.allclose(mask_lon, tcg_ds.longitude.values)
+        if not (same_lat and same_lon):
+            raise ValueError(f'The {basin} mask is not on the same latitude/longitude grid as the cropped TCG field')
+        tcg = tcg_ds.tcg.transpose('time', 'latitude', 'longitude') * mask
+    elif basin != 'GLB':
+        tcg = crop_field(tcg_ds_or, min_lon, max_lon, min_lat, max_lat).tcg
+    else:
+        tcg = tcg_ds_or.tcg
+    # Reduce both spatial dimensions in one pass on the underlying (dask) array, np.asarray triggers the computation
+    counts = np.nansum(tcg.data, axis=tcg.get_axis_num(['latitude', 'longitude']))
+    return np.asarray(counts).astype(np.int16)
+
+def feature_matrix(frames, month_col=True):
+    """
+    Fill a C-ordered float32 feature matrix column by column from dataframes sharing the same index.
+
+    Inputs:
+        frames: list of pandas.DataFrame
+            The dataframes whose columns are the features
+        month_col: bool
+            If True, add a last column containing the month of the year
+    Outputs:
+        X: numpy.ndarray
+            The (n_rows, n_features) float32 feature matrix
+        names: list of str
+            The names of the features
+    """
+    index = frames[0].index
+    names = [col for frame in frames for col in frame.columns]
+    if month_col:
+        names.append('month')
+    X = np.empty((len(index), len(names)), dtype=np.float32)
+    i = 0
+    for frame in frames:
+        for col in frame.columns:
+            X[:, i] = frame[col].to_numpy(dtype=np.float32, na_value=np.nan)
+            i += 1
+    if month_col:
+        X[:, i] = index.month
+    return X, names
+
+def stl_decompose(series, stl_backend='statsmodels'):
+    """
+    STL decomposition of a monthly time series.
+
+    Inputs:
+        series: pandas.Series
+            The time series to decompose
+        stl_backend: str
+            'statsmodels' or 'hastl' (GPU/multicore implementation, falls back to statsmodels if not installed).
+            The hastl device backend can be chosen as 'hastl-<device>', with device one of opencl (default for 'hastl'),
+            cuda, multicore or c
+    Outputs:
+        trend: pandas.Series
+            The trend component
+        seasonal: pandas.Series
+            The seasonal component
+        resid: pandas.Series
+            The residual component
+    """
+    if stl_backend not in ['statsmodels', 'hastl'] + [f'hastl-{device}' for device in _HASTL_DEVICES]:
+        raise ValueError('STL backend not recognized')
+    if stl_backend.startswith('hastl') and HSTL is None:
+        print('Warning: hastl is not installed, using statsmodels STL')
+        stl_backend = 'statsmodels'
+    stl = STL(series)
+    if stl_backend == 'statsmodels':
+        decomposition = stl.fit()
+        return decomposition.trend, decomposition.seasonal, decomposition.resid
+    # Pass every window, degree and jump of the statsmodels configuration explicitly, since hastl follows the R stl
+    # defaults (jumps of ceil(window/10)); n_inner=2, n_outer=1 is the non-robust fit (no robustness reweighting)
+    config = stl.config
+    device = 'opencl' if stl_backend == 'hastl' else stl_backend.split('-', 1)[1]
+    seasonal, trend, resid = HSTL(backend=device).fit(series.to_numpy(dtype=np.float64)[None, :],
+                                                      n_p=config['period'], q_s=config['seasonal'], q_t=config['trend'], q_l=config['low_pass'],
+                                                      d_s=config['seasonal_deg'], d_t=config['trend_deg'], d_l=config['low_pass_deg'],
+                                                      jump_s=config['seasonal_jump'], jump_t=config['trend_jump'], jump_l=config['low_pass_jump'],
+                                                      n_inner=2, n_outer=1)
+    return (pd.Series(trend[0], index=series.index, name='trend'),
+            pd.Series(seasonal[0], index=series.index, name='season'),
+            pd.Series(resid[0], index=series.index, name='resid'))
+
+def stl_resid(series, stl_backend='statsmodels'):
+    """
+    Residual of the STL decomposition of a time series.
+    STL cannot handle missing values: inner gaps are linearly interpolated before the fit and set back to NaN
+    in the residual, missing values at the start or end of the series raise a ValueError.
 
-def build_dataset(basin, cluster_variables, index_variables, cluster_path, indexes_path, target_path, first_year, last_year, deseasonalize, detrend, month_col=True):
+    Inputs:
+        series: pandas.Series
+            The time series to decompose
+        stl_backend: str
+            'statsmodels' or 'hastl'/'hastl-<device>', see stl_decompose
+    Outputs:
+        resid: pandas.Series
+            The residual component of the decomposition
+    """
+    missing = series.isnull()
+    if not missing.any():
+        return stl_decompose(series, stl_backend)[2]
+    filled = series.interpolate(limit_area='inside')
+    if filled.isnull().any():
+        dates = series.index[filled.isnull()].strftime('%Y-%m').tolist()
+        raise ValueError(f'Missing values in {series.name} at the start/end of the series cannot be interpolated: {dates}')
+    print('Warning: Missing values interpolated for the STL decomposition of', series.name, series.index[missing].strftime('%Y-%m').tolist())
+    return stl_decompose(filled, stl_backend)[2].mask(missing)
+
+def build_dataset(basin, cluster_variables, index_variables, cluster_path, indexes_path, target_path, first_year, last_year, deseasonalize, detrend, month_col=True, stl_backend='statsmodels', as_arrays=False):
     
     # Define geographical coordinates according to the basin considered
-    if basin == 'NWP':
-        min_lon, max_lon, min_lat, max_lat = 100, 180, 0, 40
-    elif basin == 'NEP':
-        min_lon, max_lon, min_lat, max_lat = -180, -75, 0, 40
-    elif basin == 'NA':
-        min_lon, max_lon, min_lat, max_lat = -100, 0, 0, 40
-    elif basin == 'NI':
-        min_lon, max_lon, min_lat, max_lat = 45, 100, 0, 40
-    elif basin == 'SP':
-        min_lon, max_lon, min_lat, max_lat = 135, -70, -40, 0
-    elif basin == 'SI':
-        min_lon, max_lon, min_lat, max_lat = 35, 135, -40, 0
-    elif basin == 'GLB':
-        min_lon, max_lon, min_lat, max_lat = -181, 181, -40, 40
-    else:
+    try:
+        min_lon, max_lon, min_lat, max_lat = _BASIN_BOX[basin]
+    except KeyError:
         raise ValueError('Basin not recognized')
 
     # Create a dataframe containing the data for the climate indeces
     date_range = pd.date_range(start=f'{first_year}-01-01', end=f'{last_year}-12-01', freq='MS')
-    df_indeces = pd.DataFrame(index=date_range, columns=index_variables)
-    for climate_index in index_variables:
+    indeces = np.full((len(date_range), len(index_variables)), np.nan, dtype=np.float32)
+    for i, climate_index in enumerate(index_variables):
         filename = os.path.join(indexes_path, climate_index + '.txt')
-        data = pd.read_table(filename, sep='\s+', header=None)
-        for r, row in enumerate(df_indeces.iterrows()):
-            idx = df_indeces.index[r]
-            month = idx.month
-            year = idx.year
-            df_indeces.loc[idx, climate_index] = data[(data[0] == year)][month].values[0]
+        indeces[:, i] = read_climate_index(filename).reindex(date_range).values
+    df_indeces = pd.DataFrame(indeces, index=date_range, columns=index_variables, copy=False)
 
     # Load the cluster data and merge it in a single dataframe
-    for v, var in enumerate(cluster_variables):
-        filename = f'averages_{var}.csv'
-        path = os.path.join(cluster_path, filename)
-        if v == 0:
-            dataset_cluster = pd.read_csv(path, index_col=0, parse_dates=True)
-            dataset_cluster = dataset_cluster[dataset_cluster.index.isin(date_range)]
-        else:
-            temp = pd.read_csv(path, index_col=0, parse_dates=True)
-            temp = temp[temp.index.isin(date_range)]
-            dataset_cluster = pd.concat([dataset_cluster, temp], axis=1)
-
-    # Merge the cluster and index dataframes
-    dataset = pd.concat([dataset_cluster, df_indeces], axis=1)
-
-    # Add a column containing the month of the year
-    if month_col:
-        dataset['month'] = dataset.index.month
+    dataset_cluster = read_cluster_data(cluster_path, cluster_variables, date_range)
+
+    # Merge the cluster and index dataframes (and add a column containing the month of the year)
+    if as_arrays:
+        # Single float32 block: dataset.to_numpy() returns the feature matrix without copying it
+        X, names = feature_matrix([dataset_cluster, df_indeces], month_col)
+        dataset = pd.DataFrame(X, index=date_range, columns=names, copy=False)
+    else:
+        dataset = dataset_cluster.merge(df_indeces, left_index=True, right_index=True, how='inner', copy=False, validate='1:1').astype(np.float32, copy=False)
+        if month_col:
+            dataset['month'] = dataset.index.month
     
     # Check if any data is missing, repeated in consecutive days, or is above the average+7*std
     for col in dataset.columns:
-        if dataset[col].isnull().sum() > 0:
+        n_null, n_repeat, n_outlier = qc_column(dataset[col].to_numpy(dtype=np.float64, na_value=np.nan))
+        if n_null > 0:
             print('Warning: Missing values in', col)
-        check_consecutive_repeats(dataset[col],col)
-        mean = dataset[col].mean()
-        std = dataset[col].std()
-        if (np.abs(dataset[col]) > mean + 7*std).sum() > 0:
+        if n_repeat > 0:
+            check_consecutive_repeats(dataset[col],col)
+        if n_outlier > 0:
             print('Warning: Values above the average+7*std in', col)
 
     # Build the dataframe for the target variable -> number of tropical cyclone genesis events per month
-    years = np.arange(first_year, last_year+1, 1)
-    tcg_ds_or = xr.concat([xr.open_dataset(target_path + f'_{year}.nc') for year in years], dim='time')
-    if basin == 'NEP' or basin == 'NA':
-        tcg_ds = crop_field(tcg_ds_or, min_lon, max_lon, min_lat, max_lat)
-        mask = xr.open_dataarray(f'{basin}_mask.nc')
-        tcg_ds = tcg_ds.where(mask == 1)
-    elif basin != 'GLB':
-        tcg_ds = crop_field(tcg_ds_or, min_lon, max_lon, min_lat, max_lat)
-    else:
-        tcg_ds = tcg_ds_or
     target = pd.DataFrame(index=date_range)
-    target['tcg'] = tcg_ds.tcg.sum(dim=['latitude', 'longitude']).values.astype(int)
+    target['tcg'] = count_tcg(basin, target_path, first_year, last_year, min_lon, max_lon, min_lat, max_lat)
 
     # If deseasonalize is True, remove the seasonal cycle, if detrend is True, remove the trend
-    if deseasonalize:
-        decomposition = STL(target['tcg']).fit()
-        deseason_target = target['tcg'] - decomposition.seasonal
-        deseason_target = deseason_target.to_frame().rename(columns={0: 'tcg'})
-        seasonal = decomposition.seasonal.to_frame()
-        return dataset, target, deseason_target, seasonal
-    elif detrend:
-        decomposition = STL(target['tcg']).fit()
-        detrend_target = target['tcg'] - decomposition.trend
-        detrend_target = detrend_target.to_frame().rename(columns={0: 'tcg'})
-        trend = decomposition.trend.to_frame()
-        return dataset, target, detrend_target, trend
+    if deseasonalize or detrend:
+        trend, seasonal, _ = stl_decompose(target['tcg'], stl_backend)
+        component = seasonal if deseasonalize else trend
+        return dataset, target, (target['tcg'] - component).to_frame('tcg'), component.to_frame()
     else:
         return dataset, target
     
-def build_dataset_noTS(basin, cluster_variables, index_variables, cluster_path, indexes_path, target_path, first_year, last_year, month_col=True):
+def build_dataset_noTS(basin, cluster_variables, index_variables, cluster_path, indexes_path, target_path, first_year, last_year, month_col=True, n_jobs=1, stl_backend='statsmodels', as_arrays=False):
     
     # Define geographical coordinates according to the basin considered
-    if basin == 'NWP':
-        min_lon, max_lon, min_lat, max_lat = 100, 180, 0, 40
-    elif basin == 'NEP':
-        min_lon, max_lon, min_lat, max_lat = -180, -75, 0, 40
-    elif basin == 'NA':
-        min_lon, max_lon, min_lat, max_lat = -100, 0, 0, 40
-    elif basin == 'NI':
-        min_lon, max_lon, min_lat, max_lat = 45, 100, 0, 40
-    elif basin == 'SP':
-        min_lon, max_lon, min_lat, max_lat = 135, -70, -40, 0
-    elif basin == 'SI':
-        min_lon, max_lon, min_lat, max_lat = 35, 135, -40, 0
-    elif basin == 'GLB':
-        min_lon, max_lon, min_lat, max_lat = -181, 181, -40, 40
-    else:
+    try:
+        min_lon, max_lon, min_lat, max_lat = _BASIN_BOX[basin]
+    except KeyError:
         raise ValueError('Basin not recognized')
 
     # Create a dataframe containing the data for the climate indeces
     date_range = pd.date_range(start=f'{first_year}-01-01', end=f'{last_year}-12-01', freq='MS')
-    df_indeces = pd.DataFrame(index=date_range, columns=index_variables)
-    df_residual_indeces = pd.DataFrame(index=date_range, columns=index_variables)
-    for climate_index in index_variables:
+    indeces = np.full((len(date_range), len(index_variables)), np.nan, dtype=np.float32)
+    for i, climate_index in enumerate(index_variables):
         filename = os.path.join(indexes_path, climate_index + '.txt')
-        data = pd.read_table(filename, sep='\s+', header=None)
-        for r, row in enumerate(df_indeces.iterrows()):
-            idx = df_indeces.index[r]
-            month = idx.month
-            year = idx.year
-            df_indeces.loc[idx, climate_index] = data[(data[0] == year)][month].values[0]
-        decomp_index = STL(df_indeces[climate_index]).fit()
-        df_residual_indeces[climate_index] = decomp_index.resid
+        indeces[:, i] = read_climate_index(filename).reindex(date_range).values
+    df_indeces = pd.DataFrame(indeces, index=date_range, columns=index_variables, copy=False)
+    # Remove trend and seasonality from the climate indeces, fitting the STL decompositions in parallel
+    residuals = Parallel(n_jobs=n_jobs)(delayed(stl_resid)(df_indeces[climate_index], stl_backend) for climate_index in index_variables)
+    residual_indeces = np.full((len(date_range), len(index_variables)), np.nan, dtype=np.float32)
+    for i, resid in enumerate(residuals):
+        residual_indeces[:, i] = resid.values
+    df_residual_indeces = pd.DataFrame(residual_indeces, index=date_range, columns=index_variables, copy=False)
 
     # Load the cluster data and merge it in a single dataframe
-    for v, var in enumerate(cluster_variables):
-        filename = f'averages_{var}.csv'
-        path = os.path.join(cluster_path, filename)
-        if v == 0:
-            dataset_cluster = pd.read_csv(path, index_col=0, parse_dates=True)
-            dataset_cluster = dataset_cluster[dataset_cluster.index.isin(date_range)]
-        else:
-            temp = pd.read_csv(path, index_col=0, parse_dates=True)
-            temp = temp[temp.index.isin(date_range)]
-            dataset_cluster = pd.concat([dataset_cluster, temp], axis=1)
-
-    # Merge the cluster and index dataframes
-    dataset = pd.concat([dataset_cluster, df_residual_indeces], axis=1)
-
-    # Add a column containing the month of the year
-    if month_col:
-        dataset['month'] = dataset.index.month
+    dataset_cluster = read_cluster_data(cluster_path, cluster_variables, date_range)
+
+    # Merge the cluster and index dataframes (and add a column containing the month of the year)
+    if as_arrays:
+        # Single float32 block: dataset.to_numpy() returns the feature matrix without copying it
+        X, names = feature_matrix([dataset_cluster, df_residual_indeces], month_col)
+        dataset = pd.DataFrame(X, index=date_range, columns=names, copy=False)
+    else:
+        dataset = dataset_cluster.merge(df_residual_indeces, left_index=True, right_index=True, how='inner', copy=False, validate='1:1').astype(np.float32, copy=False)
+        if month_col:
+            dataset['month'] = dataset.index.month
     
     # Check if any data is missing, repeated in consecutive days, or is above the average+7*std
     for col in dataset.columns:
-        if dataset[col].isnull().sum() > 0:
+        n_null, n_repeat, n_outlier = qc_column(dataset[col].to_numpy(dtype=np.float64, na_value=np.nan))
+        if n_null > 0:
             print('Warning: Missing values in', col)
-        check_consecutive_repeats(dataset[col],col)
-        mean = dataset[col].mean()
-        std = dataset[col].std()
-        if (np.abs(dataset[col]) > mean + 7*std).sum() > 0:
+        if n_repeat > 0:
+            check_consecutive_repeats(dataset[col],col)
+        if n_outlier > 0:
             print('Warning: Values above the average+7*std in', col)
 
     # Build the dataframe for the target variable -> number of tropical cyclone genesis events per month
-    years = np.arange(first_year, last_year+1, 1)
-    tcg_ds_or = xr.concat([xr.open_dataset(target_path + f'_{year}.nc') for year in years], dim='time')
-    if basin == 'NEP' or basin == 'NA':
-        tcg_ds = crop_field(tcg_ds_or, min_lon, max_lon, min_lat, max_lat)
-        mask = xr.open_dataarray(f'{basin}_mask.nc')
-        tcg_ds = tcg_ds.where(mask == 1)
-    elif basin != 'GLB':
-        tcg_ds = crop_field(tcg_ds_or, min_lon, max_lon, min_lat, max_lat)
-    else:
-        tcg_ds = tcg_ds_or
     target = pd.DataFrame(index=date_range)
-    target['tcg'] = tcg_ds.tcg.sum(dim=['latitude', 'longitude']).values.astype(int)
+    target['tcg'] = count_tcg(basin, target_path, first_year, last_year, min_lon, max_lon, min_lat, max_lat)
 
     # Detrend and deseasonalize the target variable
-    decomposition = STL(target['tcg']).fit()
-    trend = decomposition.trend.to_frame()
-    seasonal = decomposition.seasonal.to_frame()
-    residual = decomposition.resid.to_frame()
+    trend, seasonal, residual = stl_decompose(target['tcg'], stl_backend)
+    trend = trend.to_frame()
+    seasonal = seasonal.to_frame()
+    residual = residual.to_frame()
 
     return dataset, residual, trend, seasonal
\ No newline at end of file